@@ -1,3 +1,4 @@
+import importlib.util
 from pathlib import Path
 
 import yaml
@@ -13,7 +14,10 @@ class Rb2svConfig:
         "project_dir",
         "project_type",
         "topic_pairs",
+        "upload",
+        "pose_track",
     ]
+    required_upload_args = ["server_address", "api_token", "team_id"]
 
     def __init__(self, yaml_file_path: str, quiet: bool) -> None:
         self.quiet = quiet
@@ -43,7 +47,24 @@ class Rb2svConfig:
         if not self.bag_path.exists():
             raise InvalidConfigError(f"{self.bag_path} does not exist.")
 
-        if self.project_dir.exists():
+        self.pose_track = self.raw_config.get("pose_track")
+        if self.pose_track is not None:
+            self.pose_track = str(self.pose_track).lower()
+            if self.pose_track not in ("npy", "parquet"):
+                raise InvalidConfigError(
+                    f"Only accepts the following pose track format: ['npy', 'parquet']"
+                )
+            if self.pose_track == "parquet" and not importlib.util.find_spec("pyarrow"):
+                raise InvalidConfigError(
+                    "pose_track: parquet requires pyarrow to be installed."
+                )
+
+        self.upload = None
+        self.spool = True
+        if "upload" in self.raw_config.keys():
+            self.__parse_upload(self.raw_config["upload"])
+
+        if self.spool and self.project_dir.exists():
             print(f"WARN: The output directory {self.project_dir} already exists.")
             util.prompt_confirm(default=False)
 
@@ -56,6 +77,33 @@ class Rb2svConfig:
         for i, pair in enumerate(self.topic_pairs):
             self.topic_pairs[i] = self.__parse_topic_tuple(pair)
 
+    def __parse_upload(self, upload: dict):
+        """
+        Parse the options of streaming the project to a Supervisely server.
+        """
+        if not isinstance(upload, dict):
+            raise InvalidConfigError("upload should be a mapping of upload options.")
+        for p in self.required_upload_args:
+            if p not in upload.keys():
+                raise InvalidConfigError(f"upload.{p} is required.")
+
+        self.spool = bool(upload.get("spool", True))
+        self.upload = {
+            "server_address": str(upload["server_address"]),
+            "api_token": str(upload["api_token"]),
+            "team_id": int(upload["team_id"]),
+            "remote_dir": str(
+                upload.get("remote_dir", f"/rb2sv/{self.project_dir.name}")
+            ),
+            "batch_size": int(upload.get("batch_size", 16)),
+            "queue_size": int(upload.get("queue_size", 64)),
+            "workers": int(upload.get("workers", 2)),
+            "max_retries": int(upload.get("max_retries", 5)),
+        }
+        for p in ("batch_size", "queue_size", "workers"):
+            if self.upload[p] < 1:
+                raise InvalidConfigError(f"upload.{p} should be a positive integer.")
+
     def __parse_topic_tuple(self, value: str) -> tuple[str, str]:
         vals = value.strip("()").split(",")
         assert (
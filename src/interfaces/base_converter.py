@@ -1,9 +1,11 @@
 from config import Rb2svConfig
+from utils.project_writer import ProjectWriter
 
 
 class BaseConverter:
-    def __init__(self, args: Rb2svConfig) -> None:
+    def __init__(self, args: Rb2svConfig, writer: ProjectWriter) -> None:
         self.args = args
+        self.writer = writer
 
     def log(self, *args, **kargs):
         if not self.args.quiet:
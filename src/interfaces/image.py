@@ -1,4 +1,4 @@
-import json
+from collections import defaultdict
 
 import cv2
 import numpy as np
@@ -10,8 +10,14 @@ from interfaces.base_converter import BaseConverter
 
 
 class ImageConverter(BaseConverter):
-    def __init__(self, args) -> None:
-        super().__init__(args)
+    # annotations of a topic kept in memory while waiting for their tags
+    max_pending_annotations = 4096
+
+    def __init__(self, args, writer, topic_pairs) -> None:
+        self.topic_pairs = topic_pairs
+        # annotations waiting for tags, {topic_name: {img_name: annotation}}
+        self.pending_annotations = defaultdict(dict)
+        super().__init__(args, writer)
 
     def convert(self, record, compressed: bool):
         """
@@ -43,7 +49,8 @@ class ImageConverter(BaseConverter):
         )
         img_path = self.construct_img_path(topic_name, "img", img_name)
         self.log(f"Transfering {img_path}")
-        cv2.imwrite(img_path, img, [cv2.IMWRITE_JPEG_QUALITY, 100])
+        _, img_buf = cv2.imencode(".jpeg", img, [cv2.IMWRITE_JPEG_QUALITY, 100])
+        self.writer.write_bytes(img_path, img_buf.tobytes())
 
         # Prepare annotation file
         annotation = {
@@ -53,9 +60,41 @@ class ImageConverter(BaseConverter):
             "tags": [],
             "objects": [],
         }
+        if self.topic_pairs[topic_name] != "":
+            # written by write_annotation once tags are attached
+            pending = self.pending_annotations[topic_name]
+            pending[img_name] = annotation
+            if len(pending) > self.max_pending_annotations:
+                oldest = next(iter(pending))
+                self.log(f"No tag received for {oldest} of {topic_name}")
+                self.write_annotation(topic_name, oldest, pending.pop(oldest))
+            return
         ann_path = self.construct_img_path(topic_name, "ann", img_name + ".json")
-        with open(ann_path, "w") as j:
-            json.dump(annotation, j, indent=4)
+        self.writer.write_json(ann_path, annotation)
+
+    def take_annotation(self, topic_name: str, img_name: str):
+        """
+        Stop tracking a pending annotation and return it, or None if the
+        annotation is not pending. The caller is responsible for writing it.
+        """
+        return self.pending_annotations[topic_name].pop(img_name, None)
+
+    def write_annotation(self, topic_name: str, img_name: str, annotation: dict):
+        """
+        Write the annotation of an image.
+        """
+        ann_path = self.construct_img_path(topic_name, "ann", img_name + ".json")
+        self.writer.write_json(ann_path, annotation)
+
+    def write_pending_annotations(self):
+        """
+        Write the remaining annotations of images whose topic is paired with a
+        tag topic.
+        """
+        for topic_name, annotations in self.pending_annotations.items():
+            for img_name, annotation in annotations.items():
+                self.write_annotation(topic_name, img_name, annotation)
+        self.pending_annotations.clear()
 
     def construct_img_path(self, topic_name: str, file_type: str, file_name: str):
         """
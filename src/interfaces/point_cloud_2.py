@@ -1,22 +1,22 @@
-import json
 from pathlib import Path
 from collections import defaultdict
 
 import numpy as np
-import open3d as o3d
 from sensor_msgs_py import point_cloud2
 from sensor_msgs.msg import PointCloud2
 from rclpy.serialization import deserialize_message
 
+import utils.pcd as pcd
 import utils.util as util
 from interfaces.base_converter import BaseConverter
 
 
 class PointCloudConverter(BaseConverter):
-    def __init__(self, args) -> None:
-        self.frame_pcd_map_dict = defaultdict(dict)
+    def __init__(self, args, writer) -> None:
+        # frame_pointcloud_map.json of each topic, written frame by frame
+        self.frame_pcd_maps = {}
         self.frame_pcd_map_cnt = defaultdict(int)
-        super().__init__(args)
+        super().__init__(args, writer)
 
     def convert(self, record):
         """
@@ -36,22 +36,17 @@ class PointCloudConverter(BaseConverter):
         self.log(f"Transfering {pcd_path}")
 
         # record to frame_pointcloud_map
-        self.frame_pcd_map_dict[topic_name][
-            str(self.frame_pcd_map_cnt[topic_name])
-        ] = pcd_name
+        self.frame_pcd_map(topic_name).add(
+            str(self.frame_pcd_map_cnt[topic_name]), pcd_name
+        )
         self.frame_pcd_map_cnt[topic_name] += 1
 
         cloud_points = point_cloud2.read_points(
             deserialized_msg, field_names=["x", "y", "z"], skip_nans=True
         ).tolist()
 
-        # type should be float64; otherwise o3d would not run successfully
-        cloud_np = np.array(cloud_points, dtype=np.float64)
-        pcd = o3d.geometry.PointCloud()
-        pcd.points = o3d.utility.Vector3dVector(cloud_np)
-        # o3d.visualization.draw_geometries([pcd])
-
-        o3d.io.write_point_cloud(pcd_path.as_posix(), pcd)
+        cloud_np = np.array(cloud_points, dtype=np.float32).reshape(-1, 3)
+        self.writer.write_bytes(pcd_path, pcd.encode_pcd(cloud_np))
 
     def construct_pcd_path(self, topic_name: str, file_name: str):
         """
@@ -60,11 +55,22 @@ class PointCloudConverter(BaseConverter):
         topic_name = util.parse_topic_name(topic_name)
         return self.args.project_dir / topic_name / "pointcloud" / file_name
 
+    def frame_pcd_map(self, topic_name: str):
+        """
+        Get the frame_pointcloud_map.json stream of the topic, opening it on first use.
+        """
+        if topic_name not in self.frame_pcd_maps:
+            json_path = (
+                Path(self.args.project_dir)
+                / util.parse_topic_name(topic_name)
+                / "frame_pointcloud_map.json"
+            )
+            self.frame_pcd_maps[topic_name] = self.writer.open_json_object(json_path)
+        return self.frame_pcd_maps[topic_name]
+
     def write_frame_pcd_mapjson(self, topic_name: str):
-        json_path = (
-            Path(self.args.project_dir)
-            / util.parse_topic_name(topic_name)
-            / "frame_pointcloud_map.json"
-        )
-        with open(json_path, "w") as f:
-            json.dump(self.frame_pcd_map_dict[topic_name], f, indent=4)
+        """
+        Finalize the frame_pointcloud_map.json of the topic.
+        """
+        self.frame_pcd_map(topic_name).close()
+        del self.frame_pcd_maps[topic_name]
@@ -1,5 +1,8 @@
-import json
+import io
+from collections import defaultdict
 
+import numpy as np
+import pandas as pd
 from geometry_msgs.msg import PoseStamped
 from rclpy.serialization import deserialize_message
 
@@ -7,67 +10,164 @@ from utils import util
 from interfaces.base_converter import BaseConverter
 
 
+class PoseBuffer:
+    """
+    Growable columnar buffer of the poses of a single tag topic.
+    """
+
+    track_dtype = np.dtype(
+        [("sec", np.int64), ("nanosec", np.int64)]
+        + [(f, np.float64) for f in ("x", "y", "z", "qx", "qy", "qz", "qw")]
+    )
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.size = 0
+        self.stamps = np.empty((capacity, 2), dtype=np.int64)
+        self.positions = np.empty((capacity, 3), dtype=np.float64)
+        self.orientations = np.empty((capacity, 4), dtype=np.float64)
+
+    def __len__(self):
+        return self.size
+
+    def append(self, stamp, position, orientation):
+        if self.size == len(self.stamps):
+            self.__grow()
+        self.stamps[self.size] = stamp
+        self.positions[self.size] = position
+        self.orientations[self.size] = orientation
+        self.size += 1
+
+    def clear(self):
+        self.size = 0
+
+    def to_track(self) -> np.ndarray:
+        """
+        Return the buffered poses as a structured array.
+        """
+        track = np.empty(self.size, dtype=self.track_dtype)
+        track["sec"], track["nanosec"] = self.stamps[: self.size].T
+        track["x"], track["y"], track["z"] = self.positions[: self.size].T
+        (track["qx"], track["qy"], track["qz"], track["qw"]) = self.orientations[
+            : self.size
+        ].T
+        return track
+
+    def __grow(self):
+        capacity = 2 * len(self.stamps)
+        for name in ("stamps", "positions", "orientations"):
+            old = getattr(self, name)
+            new = np.empty((capacity, old.shape[1]), dtype=old.dtype)
+            new[: self.size] = old[: self.size]
+            setattr(self, name, new)
+
+
 class PoseStampedConverter(BaseConverter):
-    def __init__(self, args, topic_pairs) -> None:
-        self.prev_img_name = ""
+    # number of matched poses formatted and attached together
+    attach_batch_size = 256
+
+    def __init__(self, args, writer, topic_pairs, image_converter) -> None:
         self.topic_pairs = topic_pairs
-        super().__init__(args)
+        self.image_converter = image_converter
+        # every pose of each topic, kept only if they are written to pose tracks
+        self.pose_tracks = defaultdict(PoseBuffer)
+        # poses matching an image, waiting to be attached as tags
+        self.tag_batches = defaultdict(PoseBuffer)
+        # (img_name, annotation) of each pose in tag_batches, taken from the
+        # image converter so they are not written without their tag
+        self.tagged_annotations = defaultdict(list)
+        self.prev_stamps = {}
+        super().__init__(args, writer)
 
     def convert(self, record):
         """
-        Read msgs of geometry_msgs/msg/PoseStamped type and convert them to the tag of
-        the corresponding image.
+        Read msgs of geometry_msgs/msg/PoseStamped type into the pose buffers of
+        the topic. The poses matching an image are converted to tags by
+        attach_tags in batches.
 
         record: a single entry obtained from SequentialReader.read_next()
         """
         (topic_name, data, timestamp) = record
         deserialized_msg = deserialize_message(data, PoseStamped)
-        img_name = (
-            str(deserialized_msg.header.stamp.sec)
-            + "-"
-            + str(deserialized_msg.header.stamp.nanosec)
-            + ".jpeg"
+        stamp = (
+            deserialized_msg.header.stamp.sec,
+            deserialized_msg.header.stamp.nanosec,
+        )
+
+        if stamp == self.prev_stamps.get(topic_name):
+            return
+        self.prev_stamps[topic_name] = stamp
+
+        position = deserialized_msg.pose.position
+        orientation = deserialized_msg.pose.orientation
+        pose = (
+            stamp,
+            (position.x, position.y, position.z),
+            (orientation.x, orientation.y, orientation.z, orientation.w),
         )
-        if img_name == self.prev_img_name:
+        if self.args.pose_track is not None:
+            self.pose_tracks[topic_name].append(*pose)
+
+        img_topic = self.topic_pairs.inv_filtered[topic_name]
+        img_name = f"{stamp[0]}-{stamp[1]}.jpeg"
+        annotation = self.image_converter.take_annotation(img_topic, img_name)
+        if annotation is None:
+            self.log(f"Skip the tag of {img_name}: no image in {img_topic}")
             return
-        self.prev_img_name = img_name
 
-        ann_path = self.construct_ann_path(
-            self.topic_pairs.inv_filtered[topic_name],
-            "ann",
-            img_name + ".json",
+        batch = self.tag_batches[topic_name]
+        batch.append(*pose)
+        self.tagged_annotations[topic_name].append((img_name, annotation))
+        if len(batch) >= self.attach_batch_size:
+            self.attach_tags(topic_name)
+
+    def attach_tags(self, topic_name: str):
+        """
+        Format the poses of the topic waiting for attachment, attach them as
+        tags to the annotations of the corresponding images in one pass, and
+        write those annotations.
+        """
+        batch = self.tag_batches[topic_name]
+        img_topic = self.topic_pairs.inv_filtered[topic_name]
+        tag_name = topic_name.split("/")[-1]
+
+        poses = np.hstack(
+            (batch.positions[: len(batch)], batch.orientations[: len(batch)])
         )
+        for (img_name, annotation), pose in zip(
+            self.tagged_annotations[topic_name], poses.tolist()
+        ):
+            value = ", ".join([util.scientific_to_decimal(v) for v in pose])
+            annotation["tags"].append({"name": tag_name, "value": f"({value})"})
+            self.image_converter.write_annotation(img_topic, img_name, annotation)
+
+        batch.clear()
+        self.tagged_annotations[topic_name].clear()
+
+    def flush(self):
+        """
+        Attach the remaining buffered poses of all topics.
+        """
+        for topic_name in self.tag_batches.keys():
+            self.attach_tags(topic_name)
 
-        px = util.scientific_to_decimal(deserialized_msg.pose.position.x)
-        py = util.scientific_to_decimal(deserialized_msg.pose.position.y)
-        pz = util.scientific_to_decimal(deserialized_msg.pose.position.z)
-        ox = util.scientific_to_decimal(deserialized_msg.pose.orientation.x)
-        oy = util.scientific_to_decimal(deserialized_msg.pose.orientation.y)
-        oz = util.scientific_to_decimal(deserialized_msg.pose.orientation.z)
-        ow = util.scientific_to_decimal(deserialized_msg.pose.orientation.w)
-        tag = {
-            "name": topic_name.split("/")[-1],
-            "value": f"({px}, {py}, {pz}, {ox}, {oy}, {oz}, {ow})",
-        }
-
-        with open(ann_path, "r+") as f:
-            ann = json.load(f)
-            assert "tags" in ann, f"Annotation file {ann_path} is mal-formed."
-            ann["tags"].append(tag)
-
-            f.seek(0)
-            json.dump(ann, f, indent=4)
-            f.truncate()
-
-    def construct_ann_path(self, topic_name: str, file_type: str, file_name: str):
+    def write_pose_tracks(self, track_format: str):
         """
-        Construct the path to image annotation
+        Write the poses of each dataset to a binary pose track file.
+
+        track_format: "npy" or "parquet"
         """
-        assert file_type in [
-            "ann",
-            "img",
-            "meta",
-        ], "file type should be one of ['ann', 'img', 'meta']"
-
-        topic_name = util.parse_topic_name(topic_name)
-        return self.args.project_dir / topic_name / file_type / file_name
+        for topic_name, buffer in self.pose_tracks.items():
+            img_topic = self.topic_pairs.inv_filtered[topic_name]
+            track_path = (
+                self.args.project_dir
+                / util.parse_topic_name(img_topic)
+                / f"pose_track.{track_format}"
+            )
+            track = buffer.to_track()
+            track_buf = io.BytesIO()
+            if track_format == "npy":
+                np.save(track_buf, track)
+            else:
+                pd.DataFrame(track).to_parquet(track_buf, index=False)
+            self.log(f"Transfering {track_path}")
+            self.writer.write_bytes(track_path, track_buf.getvalue())
@@ -4,7 +4,6 @@ rb2sv.py
 Main class definition of the module rb2sv.
 """
 
-import json
 from itertools import chain
 
 from uuid import uuid4
@@ -13,6 +12,8 @@ import rosbag2_py
 import config
 import utils.util as util
 from interfaces.image import ImageConverter
+from utils.uploader import SuperviselyUploader
+from utils.project_writer import ProjectWriter
 from utils.bidict_filtered import BidictWithNoneFilter
 from interfaces.pose_stamped import PoseStampedConverter
 from interfaces.point_cloud_2 import PointCloudConverter
@@ -47,10 +48,20 @@ class Rb2sv:
         # prompt the user to confirm
         util.prompt_confirm()
 
+        # prepare the project writer, which optionally streams to a server
+        uploader = (
+            SuperviselyUploader(**self.args.upload)
+            if self.args.upload is not None
+            else None
+        )
+        self.writer = ProjectWriter(self.args.project_dir, self.args.spool, uploader)
+
         # prepare interfaces converter
-        self.image_converter = ImageConverter(args=self.args)
-        self.pos_converter = PoseStampedConverter(self.args, self.topic_pairs)
-        self.pcd_converter = PointCloudConverter(self.args)
+        self.image_converter = ImageConverter(self.args, self.writer, self.topic_pairs)
+        self.pos_converter = PoseStampedConverter(
+            self.args, self.writer, self.topic_pairs, self.image_converter
+        )
+        self.pcd_converter = PointCloudConverter(self.args, self.writer)
 
     def __check_topics_validity(self):
         """
@@ -113,14 +124,27 @@ class Rb2sv:
         project_dir = self.args.project_dir
         topic_dirs = [util.parse_topic_name(t) for t in self.topic_pairs.keys()]
 
+        # remove temporary files left by an interrupted run, see ProjectWriter
+        for tmp_file in chain(project_dir.glob(".*.tmp"), project_dir.glob("*/.*.tmp")):
+            tmp_file.unlink()
+
         if self.args.project_type == "images":
             for topic in topic_dirs:
                 for d in ("ann", "img", "meta"):
                     (project_dir / topic / d).mkdir(parents=True, exist_ok=True)
         elif self.args.project_type == "point_cloud_episodes":
             for topic in topic_dirs:
-                (project_dir / topic / "pointcloud").mkdir(parents=True, exist_ok=True)
-                (project_dir / topic / "frame_pointcloud_map.json").touch()
+                pcd_dir = project_dir / topic / "pointcloud"
+                pcd_dir.mkdir(parents=True, exist_ok=True)
+
+                # point clouds of an earlier run are not in the new frame map
+                stale_pcds = list(pcd_dir.glob("*.pcd"))
+                if stale_pcds:
+                    print(
+                        f"WARN: Removing {len(stale_pcds)} point clouds of an earlier run in {pcd_dir}."
+                    )
+                    for f in stale_pcds:
+                        f.unlink()
 
     def __construct_project_meta(self):
         """
@@ -142,18 +166,16 @@ class Rb2sv:
             "tags": tags,
             "projectType": self.args.project_type,
         }
-        with open(self.args.project_dir / "meta.json", "w") as f:
-            json.dump(meta, f, indent=4)
+        self.writer.write_json(self.args.project_dir / "meta.json", meta)
 
     def __create_pcd_annotation_file(self):
         """
-        Create annotation.json for each pcd episode
+        Create annotation.json for each pcd episode from the frames counted by
+        the point cloud converter
         """
         for pcd_topic in self.topic_pairs.keys():
             topic_dir = self.args.project_dir / util.parse_topic_name(pcd_topic)
-            frames_count = sum(
-                [1 for f in (topic_dir / "pointcloud").iterdir() if f.is_file()]
-            )
+            frames_count = self.pcd_converter.frame_pcd_map_cnt[pcd_topic]
             ann = {
                 "description": "",
                 "key": uuid4().hex,
@@ -162,15 +184,15 @@ class Rb2sv:
                 "framesCount": frames_count,
                 "frames": [],
             }
-            with open(topic_dir / "annotation.json", "w") as f:
-                json.dump(ann, f, indent=4)
+            self.writer.write_json(topic_dir / "annotation.json", ann, atomic=True)
 
     def read_into_project(self):
         """
         Dispatching function to store various msg types into project file
         by calling corresponding reading function
         """
-        self.__construct_project_structure()
+        if self.args.spool:
+            self.__construct_project_structure()
         self.__construct_project_meta()
 
         # contains all topics involved in the conversion process
@@ -197,9 +219,20 @@ class Rb2sv:
                 case _:
                     pass
 
-        if self.args.project_type == "point_cloud_episodes":
+        if self.args.project_type == "images":
+            self.pos_converter.flush()
+            self.image_converter.write_pending_annotations()
+            if self.args.pose_track is not None:
+                self.pos_converter.write_pose_tracks(self.args.pose_track)
+        elif self.args.project_type == "point_cloud_episodes":
             self.__create_pcd_annotation_file()
             for t in self.topic_pairs.keys():
                 self.pcd_converter.write_frame_pcd_mapjson(t)
 
-        print(f"Successfully convert the rosbag to {self.args.project_dir}")
+        self.writer.close()
+        if self.args.spool:
+            print(f"Successfully convert the rosbag to {self.args.project_dir}")
+        if self.args.upload is not None:
+            print(
+                f"Successfully upload the project to {self.args.upload['remote_dir']}"
+            )
@@ -0,0 +1,29 @@
+"""
+## pcd.py
+
+Encode point clouds as .pcd files.
+"""
+
+import numpy as np
+
+
+def encode_pcd(points: np.ndarray) -> bytes:
+    """
+    Encode (N, 3) points as a binary .pcd file of float32 x, y, z, with the same
+    layout as open3d.io.write_point_cloud.
+    """
+    points = np.ascontiguousarray(points, dtype="<f4").reshape(-1, 3)
+    header = (
+        "# .PCD v0.7 - Point Cloud Data file format\n"
+        "VERSION 0.7\n"
+        "FIELDS x y z\n"
+        "SIZE 4 4 4\n"
+        "TYPE F F F\n"
+        "COUNT 1 1 1\n"
+        f"WIDTH {len(points)}\n"
+        "HEIGHT 1\n"
+        "VIEWPOINT 0 0 0 1 0 0 0\n"
+        f"POINTS {len(points)}\n"
+        "DATA binary\n"
+    )
+    return header.encode() + points.tobytes()
@@ -0,0 +1,103 @@
+"""
+## project_writer.py
+
+Write files of the converted supervisely project.
+"""
+
+import io
+import os
+import json
+from pathlib import Path
+
+
+class ProjectWriter:
+    """
+    Write project files to the local project directory (the spool), to an
+    uploader, or to both.
+    """
+
+    def __init__(self, project_dir: Path, spool: bool = True, uploader=None) -> None:
+        assert (
+            spool or uploader is not None
+        ), "Converted files must be either spooled or uploaded."
+        self.project_dir = Path(project_dir)
+        self.spool = spool
+        self.uploader = uploader
+
+    def write_bytes(self, path: Path, data: bytes, atomic: bool = False):
+        """
+        path: path of the file inside the project directory
+        atomic=True writes to a temporary file first and moves it into place
+        """
+        if self.spool:
+            if atomic:
+                tmp_path = temp_path_of(path)
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            else:
+                path.write_bytes(data)
+        self.submit(path, data)
+
+    def write_json(self, path: Path, obj, atomic: bool = False):
+        self.write_bytes(path, json.dumps(obj, indent=4).encode(), atomic)
+
+    def open_json_object(self, path: Path):
+        """
+        Open a JSON object to be written entry by entry, see JsonObjectStream.
+        """
+        return JsonObjectStream(self, path)
+
+    def submit(self, path: Path, data: bytes):
+        if self.uploader is not None:
+            self.uploader.submit(path.relative_to(self.project_dir).as_posix(), data)
+
+    def close(self):
+        """
+        Wait for pending uploads to finish.
+        """
+        if self.uploader is not None:
+            self.uploader.close()
+
+
+class JsonObjectStream:
+    """
+    A flat JSON object written entry by entry in compact form, so the entries
+    do not have to be kept in memory. When spooling, the object is written to a
+    temporary file which is moved into place on close, so a partially written
+    file never replaces the final one.
+    """
+
+    def __init__(self, writer: ProjectWriter, path: Path) -> None:
+        self.writer = writer
+        self.path = path
+        self.tmp_path = temp_path_of(path)
+        self.file = open(self.tmp_path, "w+b") if writer.spool else io.BytesIO()
+        self.file.write(b"{")
+        self.count = 0
+
+    def add(self, key: str, value):
+        entry = json.dumps({key: value}, separators=(",", ":")).encode()[1:-1]
+        if self.count > 0:
+            self.file.write(b",")
+        self.file.write(entry)
+        self.count += 1
+
+    def close(self):
+        self.file.write(b"}")
+        if self.writer.uploader is not None:
+            self.file.seek(0)
+            self.writer.submit(self.path, self.file.read())
+        if self.writer.spool:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.file.close()
+            os.replace(self.tmp_path, self.path)
+        else:
+            self.file.close()
+
+
+def temp_path_of(path: Path) -> Path:
+    return path.with_name(f".{path.name}.tmp")
@@ -0,0 +1,211 @@
+"""
+## uploader.py
+
+Stream the converted project to a Supervisely-compatible server while the
+conversion is running.
+"""
+
+import time
+import queue
+import random
+import threading
+import http.client
+from uuid import uuid4
+from urllib.parse import urlsplit, urlencode
+
+from error import UploadError
+
+
+class SuperviselyUploader:
+    """
+    Upload project files through the `file-storage.bulk.upload` API of a
+    Supervisely instance.
+
+    Files are put into a bounded queue, so the conversion is throttled when the
+    network cannot keep up. Each worker thread keeps one persistent connection
+    to the server, gathers up to `batch_size` queued files into a single
+    multipart request, and retries failed requests with exponential backoff.
+    """
+
+    endpoint = "/public/api/v3/file-storage.bulk.upload"
+    retry_statuses = (408, 429, 500, 502, 503, 504)
+
+    def __init__(
+        self,
+        server_address: str,
+        api_token: str,
+        team_id: int,
+        remote_dir: str,
+        batch_size: int = 16,
+        queue_size: int = 64,
+        workers: int = 2,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        timeout: float = 60,
+    ) -> None:
+        url = urlsplit(server_address)
+        if url.scheme not in ("http", "https"):
+            raise UploadError(f"Unsupported server address {server_address}")
+        self.scheme = url.scheme
+        self.netloc = url.netloc
+        self.url_path = (
+            url.path.rstrip("/") + self.endpoint + "?" + urlencode({"teamId": team_id})
+        )
+        self.api_token = api_token
+        self.remote_dir = "/" + remote_dir.strip("/")
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.errors = []
+        self.errors_lock = threading.Lock()
+        self.workers = [
+            threading.Thread(target=self.__work, daemon=True) for _ in range(workers)
+        ]
+        for w in self.workers:
+            w.start()
+
+    def submit(self, rel_path: str, data: bytes):
+        """
+        Queue a file for uploading. Blocks while the queue is full.
+
+        rel_path: path of the file relative to the project directory
+        """
+        if self.errors:
+            raise UploadError(f"Upload aborted: {self.errors[0]}")
+        if not self.__put((f"{self.remote_dir}/{rel_path}", data)):
+            raise UploadError("Upload aborted: no upload worker is running.")
+
+    def close(self):
+        """
+        Wait until all queued files are uploaded and stop the workers.
+        """
+        for _ in self.workers:
+            self.__put(None)
+        for w in self.workers:
+            w.join()
+
+        if self.errors:
+            raise UploadError(
+                f"{len(self.errors)} upload batches failed, first error: {self.errors[0]}"
+            )
+
+    def __put(self, item) -> bool:
+        """
+        Put an item into the queue, unless no worker is left to consume it.
+        """
+        while True:
+            try:
+                self.queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                if not any(w.is_alive() for w in self.workers):
+                    return False
+
+    def __record_error(self, message: str):
+        with self.errors_lock:
+            self.errors.append(message)
+
+    def __work(self):
+        conn = self.__connect()
+        try:
+            self.__consume(conn)
+        except Exception as err:
+            self.__record_error(f"Upload worker stopped: {err!r}")
+        finally:
+            conn.close()
+
+    def __consume(self, conn):
+        running = True
+        while running:
+            batch = []
+            item = self.queue.get()
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if item is None:
+                running = False
+
+            if batch:
+                try:
+                    self.__send(conn, batch)
+                except UploadError as err:
+                    self.__record_error(err.message)
+                except Exception as err:
+                    self.__record_error(
+                        f"Failed to upload {batch[0][0]} and others: {err!r}"
+                    )
+
+    def __connect(self):
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.netloc, timeout=self.timeout)
+        return http.client.HTTPConnection(self.netloc, timeout=self.timeout)
+
+    def __send(self, conn, batch):
+        """
+        Post a batch of files as one multipart request, retrying on connection
+        errors and retryable status codes.
+        """
+        boundary = uuid4().hex
+        body = self.__encode_multipart(batch, boundary)
+        headers = {
+            "x-api-key": self.api_token,
+            "Content-Type": f"multipart/form-data; boundary={boundary}",
+            "Content-Length": str(len(body)),
+        }
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                conn.request("POST", self.url_path, body=body, headers=headers)
+                resp = conn.getresponse()
+                payload = resp.read()
+            except (OSError, http.client.HTTPException) as err:
+                # The connection is reopened by the next request
+                conn.close()
+                reason = repr(err)
+            else:
+                if resp.status < 300:
+                    return
+                reason = f"HTTP {resp.status}: {payload[:200]!r}"
+                if resp.status not in self.retry_statuses:
+                    break
+
+            if attempt < self.max_retries:
+                time.sleep(self.backoff * 2**attempt * (1 + random.random()))
+
+        raise UploadError(f"Failed to upload {batch[0][0]} and others: {reason}")
+
+    @staticmethod
+    def __encode_multipart(batch, boundary: str) -> bytes:
+        """
+        Encode the batch as alternating `path` and `file` form fields, as
+        expected by `file-storage.bulk.upload`.
+        """
+        parts = []
+        for remote_path, data in batch:
+            parts.append(
+                (
+                    f"--{boundary}\r\n"
+                    'Content-Disposition: form-data; name="path"\r\n\r\n'
+                    f"{remote_path}\r\n"
+                ).encode()
+            )
+            parts.append(
+                (
+                    f"--{boundary}\r\n"
+                    'Content-Disposition: form-data; name="file"; '
+                    f'filename="{remote_path.rsplit("/", 1)[-1]}"\r\n'
+                    "Content-Type: application/octet-stream\r\n\r\n"
+                ).encode()
+            )
+            parts.append(data)
+            parts.append(b"\r\n")
+        parts.append(f"--{boundary}--\r\n".encode())
+        return b"".join(parts)
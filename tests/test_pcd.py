@@ -0,0 +1,78 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import open3d as o3d
+except ImportError:
+    o3d = None
+
+sys.path.insert(0, (Path(__file__).parents[1] / "src").as_posix())
+
+from utils.pcd import encode_pcd
+
+
+def decode_pcd(data: bytes):
+    """
+    Split a binary .pcd file into its header fields and (N, 3) points.
+    """
+    header = {}
+    while True:
+        line, data = data.split(b"\n", 1)
+        if line.startswith(b"#"):
+            continue
+        key, value = line.decode().split(" ", 1)
+        header[key] = value
+        if key == "DATA":
+            break
+    return header, np.frombuffer(data, dtype="<f4").reshape(-1, 3)
+
+
+class TestEncodePcd(unittest.TestCase):
+    def test_round_trip(self):
+        points = np.array([[0.0, -1.5, 2.25], [1e-3, 1e6, -0.0]], dtype=np.float64)
+        header, decoded = decode_pcd(encode_pcd(points))
+
+        self.assertEqual(header["VERSION"], "0.7")
+        self.assertEqual(header["FIELDS"], "x y z")
+        self.assertEqual(header["SIZE"], "4 4 4")
+        self.assertEqual(header["TYPE"], "F F F")
+        self.assertEqual(header["COUNT"], "1 1 1")
+        self.assertEqual(header["WIDTH"], "2")
+        self.assertEqual(header["HEIGHT"], "1")
+        self.assertEqual(header["POINTS"], "2")
+        self.assertEqual(header["DATA"], "binary")
+        np.testing.assert_array_equal(decoded, points.astype(np.float32))
+
+    def test_float32_layout(self):
+        points = np.arange(12, dtype=np.float32).reshape(4, 3)
+        data = encode_pcd(points)
+        self.assertEqual(data[-points.nbytes :], points.astype("<f4").tobytes())
+
+    def test_empty_cloud(self):
+        header, decoded = decode_pcd(encode_pcd(np.empty((0, 3))))
+        self.assertEqual(header["WIDTH"], "0")
+        self.assertEqual(header["POINTS"], "0")
+        self.assertEqual(decoded.shape, (0, 3))
+
+    @unittest.skipUnless(o3d is not None, "open3d is not installed")
+    def test_same_as_open3d(self):
+        points = np.random.default_rng(0).normal(size=(100, 3)).astype(np.float32)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            o3d_path = Path(tmp_dir) / "o3d.pcd"
+            pcd = o3d.geometry.PointCloud()
+            pcd.points = o3d.utility.Vector3dVector(points.astype(np.float64))
+            o3d.io.write_point_cloud(o3d_path.as_posix(), pcd)
+            self.assertEqual(encode_pcd(points), o3d_path.read_bytes())
+
+            encoded_path = Path(tmp_dir) / "encoded.pcd"
+            encoded_path.write_bytes(encode_pcd(points))
+            loaded = o3d.io.read_point_cloud(encoded_path.as_posix())
+            np.testing.assert_array_equal(np.asarray(loaded.points), points)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,204 @@
+import io
+import sys
+import types
+import unittest
+import importlib
+from pathlib import Path
+from unittest import mock
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, (Path(__file__).parents[1] / "src").as_posix())
+
+
+def ensure_module(name: str, **attrs):
+    """
+    Register a stand-in for a ROS module when ROS is not sourced. The converters
+    only use the message types and deserialize_message, which the tests patch.
+    """
+    try:
+        importlib.import_module(name)
+    except ImportError:
+        module = types.ModuleType(name)
+        module.__dict__.update(attrs)
+        sys.modules[name] = module
+
+
+ensure_module("rclpy")
+ensure_module("rclpy.serialization", deserialize_message=None)
+ensure_module("geometry_msgs")
+ensure_module("geometry_msgs.msg", PoseStamped=None)
+ensure_module("sensor_msgs")
+ensure_module("sensor_msgs.msg", Image=None, CompressedImage=None)
+
+from interfaces.image import ImageConverter
+from interfaces.pose_stamped import PoseBuffer, PoseStampedConverter
+from utils.bidict_filtered import BidictWithNoneFilter
+
+
+class RecordingWriter:
+    def __init__(self) -> None:
+        self.files = {}
+
+    def write_bytes(self, path, data):
+        self.files[path.name] = data
+
+    def write_json(self, path, obj):
+        self.files[path.name] = obj
+
+
+def image_msg(sec: int):
+    return SimpleNamespace(
+        header=SimpleNamespace(stamp=SimpleNamespace(sec=sec, nanosec=0)),
+        height=1,
+        width=1,
+        data=bytes(3),
+    )
+
+
+def pose_msg(sec: int, position=(1.0, 2.0, 3.0), orientation=(0.0, 0.0, 0.0, 1.0)):
+    return SimpleNamespace(
+        header=SimpleNamespace(stamp=SimpleNamespace(sec=sec, nanosec=0)),
+        pose=SimpleNamespace(
+            position=SimpleNamespace(**dict(zip("xyz", position))),
+            orientation=SimpleNamespace(**dict(zip("xyzw", orientation))),
+        ),
+    )
+
+
+class TestPoseStampedConverter(unittest.TestCase):
+    def setUp(self):
+        for module in ("interfaces.image", "interfaces.pose_stamped"):
+            patcher = mock.patch(
+                f"{module}.deserialize_message", lambda data, msg_type: data
+            )
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.args = SimpleNamespace(
+            quiet=True, project_dir=Path("out"), pose_track=None
+        )
+        self.writer = RecordingWriter()
+        topic_pairs = BidictWithNoneFilter({"/camera": "/pose"})
+        self.image_converter = ImageConverter(self.args, self.writer, topic_pairs)
+        self.pose_converter = PoseStampedConverter(
+            self.args, self.writer, topic_pairs, self.image_converter
+        )
+
+    def convert_image(self, sec: int):
+        self.image_converter.convert(("/camera", image_msg(sec), 0), compressed=False)
+
+    def convert_pose(self, sec: int, **kargs):
+        self.pose_converter.convert(("/pose", pose_msg(sec, **kargs), 0))
+
+    def finish(self):
+        self.pose_converter.flush()
+        self.image_converter.write_pending_annotations()
+
+    def tags_of(self, sec: int):
+        return self.writer.files[f"{sec}-0.jpeg.json"]["tags"]
+
+    def test_tags_survive_eviction(self):
+        # far more images than max_pending_annotations arrive before a batch of
+        # matched poses is attached
+        for sec in range(20000):
+            self.convert_image(sec)
+            if sec % 20 == 0:
+                self.convert_pose(sec)
+        self.finish()
+
+        tagged = [
+            name
+            for name, ann in self.writer.files.items()
+            if name.endswith(".json") and ann["tags"]
+        ]
+        self.assertEqual(len(tagged), 1000)
+        self.assertEqual(len(self.tags_of(0)), 1)
+        self.assertEqual(self.tags_of(1), [])
+
+    def test_pose_before_image_is_skipped(self):
+        self.convert_pose(0)
+        self.convert_image(0)
+        self.finish()
+        self.assertEqual(self.tags_of(0), [])
+
+    def test_tag_value(self):
+        self.convert_image(0)
+        self.convert_pose(
+            0,
+            position=(-1.5, -0.0, 1e-30),
+            orientation=(2.0, -100.0, 0.1, -3e-7),
+        )
+        self.finish()
+        # formatted by the per-value code before poses were buffered
+        self.assertEqual(
+            self.tags_of(0),
+            [
+                {
+                    "name": "pose",
+                    "value": "(-1.5, -0, 0.000000000000000000000000000001, 2, -100, "
+                    "0.1000000000000000055511151231257827, "
+                    "-0.00000029999999999999998642443354777)",
+                }
+            ],
+        )
+
+    def test_duplicate_stamp(self):
+        self.convert_image(0)
+        self.convert_pose(0)
+        self.convert_pose(0)
+        self.finish()
+        self.assertEqual(len(self.tags_of(0)), 1)
+
+    def test_pose_track_has_every_pose(self):
+        self.args.pose_track = "npy"
+        for sec in range(10):
+            if sec % 2 == 0:
+                self.convert_image(sec)
+            self.convert_pose(sec, position=(sec, 0.0, 0.0))
+        self.finish()
+        self.pose_converter.write_pose_tracks("npy")
+
+        track = np.load(io.BytesIO(self.writer.files["pose_track.npy"]))
+        np.testing.assert_array_equal(track["sec"], np.arange(10))
+        np.testing.assert_array_equal(track["x"], np.arange(10))
+        self.assertEqual(len(self.tags_of(4)), 1)
+
+
+class TestPoseBuffer(unittest.TestCase):
+    def test_growth(self):
+        buffer = PoseBuffer()
+        for i in range(2500):
+            buffer.append((i, i + 1), (i, -i, 0.5), (0.0, 0.0, i, 1.0))
+
+        self.assertEqual(len(buffer), 2500)
+        self.assertGreaterEqual(len(buffer.stamps), 2500)
+        np.testing.assert_array_equal(buffer.stamps[:2500, 0], np.arange(2500))
+        np.testing.assert_array_equal(buffer.positions[:2500, 1], -np.arange(2500))
+
+    def test_to_track(self):
+        buffer = PoseBuffer(capacity=1)
+        buffer.append((1, 2), (3.0, 4.0, 5.0), (6.0, 7.0, 8.0, 9.0))
+        buffer.append((10, 20), (-3.0, -4.0, -5.0), (-6.0, -7.0, -8.0, -9.0))
+        track = buffer.to_track()
+
+        self.assertEqual(
+            track.dtype.names,
+            ("sec", "nanosec", "x", "y", "z", "qx", "qy", "qz", "qw"),
+        )
+        self.assertEqual(track[0].tolist(), (1, 2, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0))
+        self.assertEqual(
+            track[1].tolist(), (10, 20, -3.0, -4.0, -5.0, -6.0, -7.0, -8.0, -9.0)
+        )
+
+    def test_clear(self):
+        buffer = PoseBuffer()
+        buffer.append((1, 2), (3.0, 4.0, 5.0), (6.0, 7.0, 8.0, 9.0))
+        buffer.clear()
+        self.assertEqual(len(buffer), 0)
+        self.assertEqual(len(buffer.to_track()), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
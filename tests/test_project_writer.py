@@ -0,0 +1,88 @@
+import sys
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, (Path(__file__).parents[1] / "src").as_posix())
+
+from utils.project_writer import ProjectWriter, temp_path_of
+
+
+class RecordingUploader:
+    def __init__(self) -> None:
+        self.files = {}
+
+    def submit(self, rel_path: str, data: bytes):
+        self.files[rel_path] = data
+
+    def close(self):
+        pass
+
+
+class TestProjectWriter(unittest.TestCase):
+    entries = {
+        "0": "1700000000-1.pcd",
+        'quote"key': "back\\slash",
+        "new\nline": "tab\tvalue",
+        "ünïcode": "雲.pcd",
+        "": "",
+    }
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.project_dir = Path(tmp_dir.name)
+        (self.project_dir / "ds").mkdir()
+        self.path = self.project_dir / "ds" / "frame_pointcloud_map.json"
+
+    def stream(self, writer, entries):
+        stream = writer.open_json_object(self.path)
+        for key, value in entries.items():
+            stream.add(key, value)
+        return stream
+
+    def test_stream_round_trip(self):
+        self.stream(ProjectWriter(self.project_dir), self.entries).close()
+        self.assertEqual(json.loads(self.path.read_text()), self.entries)
+
+    def test_empty_stream(self):
+        self.stream(ProjectWriter(self.project_dir), {}).close()
+        self.assertEqual(self.path.read_text(), "{}")
+
+    def test_stream_is_atomic(self):
+        stream = self.stream(ProjectWriter(self.project_dir), self.entries)
+        self.assertFalse(self.path.exists())
+        self.assertTrue(temp_path_of(self.path).exists())
+
+        stream.close()
+        self.assertTrue(self.path.exists())
+        self.assertFalse(temp_path_of(self.path).exists())
+
+    def test_stream_upload_without_spool(self):
+        self.stream(ProjectWriter(self.project_dir), self.entries).close()
+        spooled = self.path.read_bytes()
+        self.path.unlink()
+
+        uploader = RecordingUploader()
+        writer = ProjectWriter(self.project_dir, spool=False, uploader=uploader)
+        self.stream(writer, self.entries).close()
+
+        self.assertEqual(uploader.files, {"ds/frame_pointcloud_map.json": spooled})
+        self.assertEqual(list((self.project_dir / "ds").iterdir()), [])
+
+    def test_atomic_write(self):
+        self.path.write_text("stale")
+        uploader = RecordingUploader()
+        writer = ProjectWriter(self.project_dir, uploader=uploader)
+        writer.write_json(self.path, self.entries, atomic=True)
+
+        self.assertEqual(json.loads(self.path.read_text()), self.entries)
+        self.assertFalse(temp_path_of(self.path).exists())
+        self.assertEqual(
+            uploader.files["ds/frame_pointcloud_map.json"], self.path.read_bytes()
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
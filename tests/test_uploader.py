@@ -0,0 +1,124 @@
+import sys
+import socket
+import threading
+import unittest
+import http.server
+from pathlib import Path
+
+sys.path.insert(0, (Path(__file__).parents[1] / "src").as_posix())
+
+from error import UploadError
+from utils.uploader import SuperviselyUploader
+
+
+def unused_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class MockSuperviselyHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Accept file-storage.bulk.upload requests, failing the requests listed in
+    server.fail_requests with 503.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        with self.server.lock:
+            self.server.request_count += 1
+            fail = self.server.request_count in self.server.fail_requests
+            if not fail:
+                self.server.requests.append((self.path, self.headers, body))
+
+        status, payload = (503, b"") if fail else (200, b"{}")
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestSuperviselyUploader(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), MockSuperviselyHandler
+        )
+        self.server.lock = threading.Lock()
+        self.server.request_count = 0
+        self.server.fail_requests = ()
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.address = f"http://127.0.0.1:{self.server.server_port}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def upload(self, files, api_token="token", **kargs):
+        uploader = SuperviselyUploader(
+            self.address, api_token, 7, "/rb2sv/out", backoff=0.01, **kargs
+        )
+        for rel_path, data in files:
+            uploader.submit(rel_path, data)
+        uploader.close()
+
+    def test_batching(self):
+        files = [(f"ds/img/{i}.jpeg", bytes([i]) * 10) for i in range(10)]
+        self.upload(files, batch_size=4, queue_size=2, workers=1)
+
+        self.assertLessEqual(
+            max(body.count(b'name="path"') for _, _, body in self.server.requests),
+            4,
+        )
+        bodies = b"".join(body for _, _, body in self.server.requests)
+        for rel_path, data in files:
+            self.assertIn(f"/rb2sv/out/{rel_path}\r\n".encode(), bodies)
+            self.assertIn(data + b"\r\n", bodies)
+
+        path, headers, _ = self.server.requests[0]
+        self.assertEqual(path, "/public/api/v3/file-storage.bulk.upload?teamId=7")
+        self.assertEqual(headers["x-api-key"], "token")
+
+    def test_retry_on_503(self):
+        self.server.fail_requests = (1, 2)
+        self.upload([("ds/img/0.jpeg", b"data")], max_retries=2)
+
+        self.assertEqual(self.server.request_count, 3)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_retry_exhausted(self):
+        self.server.fail_requests = (1, 2)
+        with self.assertRaises(UploadError):
+            self.upload([("ds/img/0.jpeg", b"data")], max_retries=1)
+
+    def test_connection_refused(self):
+        self.address = f"http://127.0.0.1:{unused_port()}"
+        with self.assertRaisesRegex(UploadError, "ds/img/0.jpeg"):
+            self.upload([("ds/img/0.jpeg", b"data")], max_retries=1)
+
+    def test_invalid_token(self):
+        # http.client rejects header values with a newline, e.g. from a YAML block
+        files = [(f"ds/img/{i}.jpeg", b"data") for i in range(10)]
+        with self.assertRaisesRegex(UploadError, "ValueError"):
+            self.upload(files, api_token="token\n", queue_size=1, workers=1)
+        self.assertEqual(self.server.request_count, 0)
+
+    def test_dead_workers(self):
+        uploader = SuperviselyUploader(
+            self.address, "token", 7, "/rb2sv/out", queue_size=1, workers=1
+        )
+        uploader.submit("ds/img/0.jpeg", b"data")
+        uploader.close()
+        with self.assertRaisesRegex(UploadError, "no upload worker"):
+            for i in range(3):
+                uploader.submit(f"ds/img/{i}.jpeg", b"data")
+        uploader.close()
+
+
+if __name__ == "__main__":
+    unittest.main()